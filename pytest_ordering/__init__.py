@@ -23,22 +23,24 @@ orders_map = {
     'eighth_to_last': -8,
 }
 
+_provided_by_pytest_ordering = "Provided by pytest-ordering. See also: http://pytest-ordering.readthedocs.org/"
+
+# Markers registered in the pytest configuration, built once at import time
+_markers_config_lines = ["run: specify ordering information for when tests should run in relation to one another." +
+                         _provided_by_pytest_ordering]
+_markers_config_lines.extend('{}: run test {}. {}'.format(mark_name, mark_name.replace('_', ' '),
+                                                          _provided_by_pytest_ordering)
+                             for mark_name in orders_map)
+
+_orders_mark_names = frozenset(orders_map)
+
 
 def pytest_configure(config):
     """
     Register the 'run' marker in the pytest configuration object.
     """
 
-    provided_by_pytest_ordering = "Provided by pytest-ordering. See also: http://pytest-ordering.readthedocs.org/"
-    config_line = "run: specify ordering information for when tests should run in relation to one another." + \
-                  provided_by_pytest_ordering
-
-    config.addinivalue_line('markers', config_line)
-
-    for mark_name in orders_map.keys():
-        config_line = '{}: run test {}. {}'.format(mark_name,
-                                                   mark_name.replace('_', ' '),
-                                                   provided_by_pytest_ordering)
+    for config_line in _markers_config_lines:
         config.addinivalue_line('markers', config_line)
 
 
@@ -60,7 +62,9 @@ def pytest_collection_modifyitems(session, config, items) -> None:
       e.g. @pytest.mark.run(before='test_dependant_functionality')
     """
 
-    grouped_items = {}
+    # Sorting keys: tests with a positive order go first, followed by the unordered tests and the tests with a
+    # negative order. The sort is stable, so tests with the same key keep their collection order.
+    sort_keys = []
 
     # Loop over the collected items
     # An item has the following properties that can be helpful to create a after/before marker
@@ -68,14 +72,14 @@ def pytest_collection_modifyitems(session, config, items) -> None:
 
     for item in items:
 
-        print(f"Item name: {item.name}")
+        # Collect the names of the item markers in a single pass, instead of looking up every order marker
+        item_mark_names = {mark.name for mark in item.iter_markers()}
 
-        for mark_name, order in orders_map.items():
-            mark = item.get_closest_marker(mark_name)
-
-            if mark:
-                item.add_marker(pytest.mark.run(order=order))
-                break
+        if not _orders_mark_names.isdisjoint(item_mark_names):
+            for mark_name, order in orders_map.items():
+                if mark_name in item_mark_names:
+                    item.add_marker(pytest.mark.run(order=order))
+                    break
 
         mark = item.get_closest_marker('run')
 
@@ -84,18 +88,11 @@ def pytest_collection_modifyitems(session, config, items) -> None:
         else:
             order = None
 
-        grouped_items.setdefault(order, []).append(item)
-
-    sorted_items = []
-    unordered_items = [grouped_items.pop(None, [])]
-
-    start_list = sorted((i for i in grouped_items.items() if i[0] >= 0),
-                        key=operator.itemgetter(0))
-    end_list = sorted((i for i in grouped_items.items() if i[0] < 0),
-                      key=operator.itemgetter(0))
-
-    sorted_items.extend([i[1] for i in start_list])
-    sorted_items.extend(unordered_items)
-    sorted_items.extend([i[1] for i in end_list])
+        if order is None:
+            sort_keys.append((1, 0))
+        elif order >= 0:
+            sort_keys.append((0, order))
+        else:
+            sort_keys.append((2, order))
 
-    items[:] = [item for sublist in sorted_items for item in sublist]
+    items[:] = [item for _, item in sorted(zip(sort_keys, items), key=operator.itemgetter(0))]
@@ -29,3 +29,6 @@ end_test_items_map = {
 }
 
 special_test_items = list(start_test_items_map.keys()) + list(end_test_items_map.keys())
+
+# Names of all the special test items as a set, for constant time membership checks
+_special_test_items_set = frozenset(special_test_items)
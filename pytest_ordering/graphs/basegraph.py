@@ -3,27 +3,48 @@ DirectedGraph implements a direct graph class, with methods to detect cycles, pe
 directed graph operations. The internal handling of ID is strictly using integers.
 """
 
-from typing import List
-from collections import defaultdict
-import copy
+from typing import List, Dict, Iterable, Optional
+from collections import defaultdict, deque
 
-from pytest_ordering.utils import require_in_list, require_not_empty
+from pytest_ordering.utils import require_in_list
+
+# Flags of the vertex states used in the cycle search
+VERTEX_VISITED = 1
+VERTEX_IN_STACK = 2
+
+# Valid values of the traversal direction and of the isolated vertices position arguments
+DIRECTIONS = ('forward', 'backward')
+ISOLATED_VERTICES_POSITIONS = ('start', 'end')
 
 
 class BaseDirectedGraph:
 
+    # Maximum number of vertices searched to update the topological order after adding an edge, beyond this limit
+    # the order is dropped and cycles are looked for with a full search of the graph when needed
+    order_search_limit = 100
+
     def __init__(self):
         """
         Initialize a new graph object, including dictionaries to keep track of the vertices and edges
         """
 
-        self.vertices = []
-        self.graph = defaultdict(list)
-        self.graph_inv = defaultdict(list)
+        # Vertices are mapped to a unique index (assigned in insertion order and never reused), for constant time
+        # membership checks and lookups
+        self.vertices: Dict[int, int] = {}
+        self._new_idx = 0
 
-        # Implement caching of responses to avoid recalculating them
-        self._recompute_cycle = True
+        # Adjacency is stored in insertion-ordered dicts (used as ordered sets, values are None), which give constant
+        # time membership checks and removals while keeping the traversal order reproducible
+        self.graph = defaultdict(dict)
+        self.graph_inv = defaultdict(dict)
+
+        # Implement caching of responses to avoid recalculating them (an empty graph has no cycle)
+        self._recompute_cycle = False
         self._cycle = []
+        self._dependants = {}
+
+        # Topological position of each vertex, maintained incrementally while the graph is acyclic (None otherwise)
+        self._order: Optional[Dict[int, int]] = {}
 
     # ----------------------------- VERTICES ------------------------------#
     def add_vertex(self, vertex_id: int) -> None:
@@ -33,9 +54,12 @@ class BaseDirectedGraph:
             vertex_id (int): the numeric vertex ID
         """
 
+        # A new vertex has no edges yet, hence it cannot change the cycle of the graph
         if vertex_id not in self.vertices:
-            self._recompute_cycle = True
-            self.vertices.append(vertex_id)
+            self.vertices[vertex_id] = self._new_idx
+            if self._order is not None:
+                self._order[vertex_id] = self._new_idx
+            self._new_idx += 1
 
     def remove_vertex(self, vertex_id: int) -> None:
         """
@@ -45,21 +69,28 @@ class BaseDirectedGraph:
         """
 
         if vertex_id in self.vertices:
-            # Remove vertex from vertex list
-            self._recompute_cycle = True
-            self.vertices.remove(vertex_id)
+            # The cached cycle is only outdated if the vertex was part of it
+            if vertex_id in self._cycle:
+                self._recompute_cycle = True
+            self._dependants = {}
 
-            # Remove vertex as starting point from graph & inverted graph
-            _ = self.graph.pop(vertex_id, None)
-            _ = self.graph_inv.pop(vertex_id, None)
+            # Remove vertex from vertices map
+            del self.vertices[vertex_id]
+            if self._order is not None:
+                del self._order[vertex_id]
 
-            # Remove vertex as end point from graph & inverted graph only if they exist in the list
-            for start_vertex_id in self.graph:
-                if vertex_id in self.graph[start_vertex_id]:
-                    self.graph[start_vertex_id].remove(vertex_id)
-            for start_vertex_id in self.graph_inv:
-                if vertex_id in self.graph_inv[start_vertex_id]:
-                    self.graph_inv[start_vertex_id].remove(vertex_id)
+            # Remove vertex as starting point from graph & inverted graph
+            end_vertices_ids = self.graph.pop(vertex_id, {})
+            start_vertices_ids = self.graph_inv.pop(vertex_id, {})
+
+            # Remove vertex as end point from graph & inverted graph, only its neighbours need to be updated (a self
+            # loop was already removed together with the vertex own entries)
+            for start_vertex_id in start_vertices_ids:
+                if start_vertex_id != vertex_id:
+                    del self.graph[start_vertex_id][vertex_id]
+            for end_vertex_id in end_vertices_ids:
+                if end_vertex_id != vertex_id:
+                    del self.graph_inv[end_vertex_id][vertex_id]
 
     # ----------------------------- EDGES ------------------------------#
     def add_edge(self, start_vertex_id: int, end_vertex_id: int) -> None:
@@ -75,9 +106,19 @@ class BaseDirectedGraph:
         self.add_vertex(end_vertex_id)
 
         if end_vertex_id not in self.graph[start_vertex_id]:
-            self._recompute_cycle = True
-            self.graph[start_vertex_id].append(end_vertex_id)
-            self.graph_inv[end_vertex_id].append(start_vertex_id)
+            self._dependants = {}
+            self.graph[start_vertex_id][end_vertex_id] = None
+            self.graph_inv[end_vertex_id][start_vertex_id] = None
+
+            # Update the topological order, the graph stays acyclic if the order could be updated
+            if self._order is not None:
+                if self._update_order(start_vertex_id, end_vertex_id):
+                    return
+                self._order = None
+
+            # A new edge cannot remove a cycle, only an acyclic graph needs to be checked again
+            if not self._cycle:
+                self._recompute_cycle = True
 
     def remove_edge(self, start_vertex_id: int, end_vertex_id: int) -> None:
         """
@@ -89,42 +130,126 @@ class BaseDirectedGraph:
 
         if start_vertex_id in self.graph:
             if end_vertex_id in self.graph[start_vertex_id]:
-                self._recompute_cycle = True
-                self.graph[start_vertex_id].remove(end_vertex_id)
-                self.graph_inv[end_vertex_id].remove(start_vertex_id)
+                # The cached cycle is only outdated if the edge was part of it
+                if (start_vertex_id, end_vertex_id) in zip(self._cycle, self._cycle[1:]):
+                    self._recompute_cycle = True
+                self._dependants = {}
+                del self.graph[start_vertex_id][end_vertex_id]
+                del self.graph_inv[end_vertex_id][start_vertex_id]
+
+    def _update_order(self, start_vertex_id: int, end_vertex_id: int) -> bool:
+        """
+        Private method: Update the topological order after adding an edge (Pearce-Kelly algorithm). Only the
+        vertices between the end and the start vertex positions that are affected by the new edge are searched and
+        reordered.
+        Returns:
+            updated (bool): False if the new edge closes a cycle or affects more than order_search_limit vertices,
+                in which case the order is left untouched
+        """
+
+        # Bind the lookups used in the search loops to local names
+        order = self._order
+        graph = self.graph
+        graph_inv = self.graph_inv
+        search_limit = self.order_search_limit
+
+        lower_bound = order[end_vertex_id]
+        upper_bound = order[start_vertex_id]
+
+        if lower_bound > upper_bound:
+            return True
+        if lower_bound == upper_bound:
+            return False
+
+        # Vertices reachable from the end vertex that are currently placed before the start vertex
+        forward_vertices = []
+        visited_vertices = {end_vertex_id}
+        vertices_stack = [end_vertex_id]
+        while vertices_stack:
+            vertex_id = vertices_stack.pop()
+            forward_vertices.append(vertex_id)
+            if len(forward_vertices) > search_limit:
+                return False
+            for neighbour_id in graph[vertex_id]:
+                neighbour_position = order[neighbour_id]
+                if neighbour_position == upper_bound:
+                    return False
+                if neighbour_id not in visited_vertices and neighbour_position < upper_bound:
+                    visited_vertices.add(neighbour_id)
+                    vertices_stack.append(neighbour_id)
+
+        # Vertices reaching the start vertex that are currently placed after the end vertex
+        backward_vertices = []
+        visited_vertices = {start_vertex_id}
+        vertices_stack = [start_vertex_id]
+        while vertices_stack:
+            vertex_id = vertices_stack.pop()
+            backward_vertices.append(vertex_id)
+            if len(forward_vertices) + len(backward_vertices) > search_limit:
+                return False
+            for neighbour_id in graph_inv[vertex_id]:
+                if neighbour_id not in visited_vertices and order[neighbour_id] > lower_bound:
+                    visited_vertices.add(neighbour_id)
+                    vertices_stack.append(neighbour_id)
+
+        # Place the backward vertices before the forward vertices, reusing the positions they occupied
+        backward_vertices.sort(key=order.__getitem__)
+        forward_vertices.sort(key=order.__getitem__)
+        affected_vertices = backward_vertices + forward_vertices
+        positions = sorted(order[vertex_id] for vertex_id in affected_vertices)
+        for vertex_id, position in zip(affected_vertices, positions):
+            order[vertex_id] = position
+
+        return True
 
     # ----------------------------- CYCLES ------------------------------#
-    def get_subcycle(self, vertex_id: int, vertex_visited: List[bool], recursion_stack: List[bool]) -> List:
+    def get_subcycle(self, vertex_id: int, vertex_state: bytearray) -> List:
         """
-        Function checks if any of the children nodes is in the recursion stack and returns a list with the
-        cycle elements in it.
+        Function performs an iterative depth-first search starting from the given vertex and checks if any of the
+        visited vertices points to a vertex in the recursion stack, returning a list with the cycle elements in it.
         Args:
             vertex_id (int): the vertex ID for which the sub_cycle search needs to be performed
-            vertex_visited (list): list of booleans indicating if a vertex has been visited
-            recursion_stack (list): list of booleans indicating which vertices have been visited in the recursion
-                procedure
+            vertex_state (bytearray): state flags of the vertices (indexed by vertex index), indicating if a vertex has
+                been visited (VERTEX_VISITED) and if it is on the current search path (VERTEX_IN_STACK)
         Returns:
-            subcycle (list): list containing the IDs of elements part of an identified cycle
+            subcycle (list): list containing the IDs of elements part of an identified cycle, the first element is
+                repeated at the end of the list to close the cycle
         """
 
+        # Bind the lookups used in the search loop to local names
+        graph = self.graph
+        vertices = self.vertices
+
         # Mark current node as visited and add it to the recursion stack
-        vertex_idx = self.vertices.index(vertex_id)
-        vertex_visited[vertex_idx] = True
-        recursion_stack[vertex_idx] = True
-
-        # Recur for all neighbours, if any neighbour is visited and in recursion stack then graph is cyclic
-        for neighbour_id in self.graph[vertex_id]:
-            neighbour_idx = self.vertices.index(neighbour_id)
-            if not vertex_visited[neighbour_idx]:
-                subcycle_ids = self.get_subcycle(neighbour_id, vertex_visited, recursion_stack)
-                if subcycle_ids:
-                    subcycle_ids.append(vertex_id)
-                    return subcycle_ids
-            elif recursion_stack[neighbour_idx]:
-                return [vertex_id]
-
-        # The node needs to be popped from recursion stack (because not cycle was found) before function ends
-        recursion_stack[vertex_idx] = False
+        vertex_state[vertices[vertex_id]] = VERTEX_VISITED | VERTEX_IN_STACK
+
+        # The stack holds the current search path, together with the neighbours still to be explored for each vertex
+        stack = [(vertex_id, iter(graph[vertex_id]))]
+
+        while stack:
+            current_id, neighbours = stack[-1]
+
+            # Resume the neighbours iteration, descend into the first unvisited neighbour, if a neighbour is in the
+            # recursion stack then graph is cyclic
+            for neighbour_id in neighbours:
+                neighbour_idx = vertices[neighbour_id]
+                neighbour_state = vertex_state[neighbour_idx]
+                if not neighbour_state:
+                    vertex_state[neighbour_idx] = VERTEX_VISITED | VERTEX_IN_STACK
+                    stack.append((neighbour_id, iter(graph[neighbour_id])))
+                    break
+                elif neighbour_state & VERTEX_IN_STACK:
+                    # Unwind the search path back to the neighbour, which closes the cycle
+                    subcycle_ids = deque([neighbour_id])
+                    for path_id, _ in reversed(stack):
+                        subcycle_ids.appendleft(path_id)
+                        if path_id == neighbour_id:
+                            break
+                    return list(subcycle_ids)
+            else:
+                # All neighbours explored, the vertex needs to be popped from the recursion stack (no cycle was found)
+                vertex_state[vertices[current_id]] = VERTEX_VISITED
+                stack.pop()
 
         return []
 
@@ -139,27 +264,41 @@ class BaseDirectedGraph:
         if not self._recompute_cycle:
             return self._cycle
 
-        # Initialize the tracking list to be the size of the new id, to avoid problems with deleted vertices
-        num_vertices = len(self.vertices)
-        vertex_visited = [False] * num_vertices
-        recursion_stack = [False] * num_vertices
-
-        for vertex_idx, vertex_id in enumerate(self.vertices):
-            if not vertex_visited[vertex_idx]:
-                cycle_ids = self.get_subcycle(vertex_id, vertex_visited, recursion_stack)
+        # A graph without edges has no cycle, any order of the vertices is a topological order
+        if not any(self.graph.values()):
+            self._cycle = []
+            self._recompute_cycle = False
+            if self._order is None:
+                self._order = dict(self.vertices)
+            return []
+
+        # Peel off the vertices without incoming edges, if all of them can be released the graph is acyclic and the
+        # release order is a topological order
+        released_vertices = self._release_vertices(self.vertices)
+        if len(released_vertices) == len(self.vertices):
+            self._cycle = []
+            self._recompute_cycle = False
+            if self._order is None:
+                self._order = {vertex_id: position for position, vertex_id in enumerate(released_vertices)}
+            return []
+
+        # The vertices left over are part of, or reachable from, a cycle: search them for it. The released vertices
+        # are never reached, since they cannot be reached from the remaining ones.
+        # One byte of state flags per vertex index (the indices of removed vertices stay unused)
+        released_vertices = set(released_vertices)
+        vertex_state = bytearray(self._new_idx)
+
+        for vertex_id, vertex_idx in self.vertices.items():
+            if vertex_id not in released_vertices and not vertex_state[vertex_idx]:
+                cycle_ids = self.get_subcycle(vertex_id, vertex_state)
                 if cycle_ids:
-                    cycle_ids.reverse()
-                    cycle_ids.append(vertex_id)
-
                     # Cache results
                     self._cycle = cycle_ids
                     self._recompute_cycle = False
                     return cycle_ids
 
-        # Cache results
-        self._cycle = []
-        self._recompute_cycle = False
-        return []
+        # Not reachable: the vertices that could not be released always lead to a cycle
+        raise RuntimeError("No cycle found among the vertices with incoming edges left by Kahn's algorithm.")
 
     def is_cyclic(self) -> bool:
         """
@@ -182,69 +321,98 @@ class BaseDirectedGraph:
             vertices (list): List of dependant vertices IDs
         """
 
-        require_in_list(direction, ['forward', 'backward'])
+        require_in_list(direction, DIRECTIONS)
+
+        # Returned cached response, if no changes have been made to the edges
+        if (vertex_id, direction) in self._dependants:
+            return list(self._dependants[(vertex_id, direction)])
 
-        try:
-            vertex_dependants = self._get_vertex_dependants(vertex_id, direction=direction)
-            vertex_dependants = list(set(vertex_dependants))
-        except RecursionError:
-            print("A recursion error is probably being caused by a cycle in the graph. Please make sure your directed "
-                  "graph has no cycles.")
-            raise
+        vertex_dependants = self._get_vertex_dependants(vertex_id, direction=direction)
 
+        # Cache results
+        self._dependants[(vertex_id, direction)] = tuple(vertex_dependants)
         return vertex_dependants
 
     def _get_vertex_dependants(self, vertex_id: int, direction: str = 'forward') -> List:
         """
         Private method: Get dependant vertices, based on a starting vertex ID.
-        Separates dependants list creation from error handling performed in the corresponding public method
+        Separates dependants list creation from the caching performed in the corresponding public method.
+        The graph is traversed breadth-first and each dependant is listed once, in the order it is reached.
         """
 
-        dependant_vertices = self.graph[vertex_id] if direction == 'forward' else self.graph_inv[vertex_id]
+        graph = self.graph if direction == 'forward' else self.graph_inv
 
-        if dependant_vertices:
-            for dependant_vertex in dependant_vertices:
-                dependant_vertex_dependants = self._get_vertex_dependants(dependant_vertex, direction=direction)
-                dependant_vertices += dependant_vertex_dependants
+        dependant_vertices = []
+        visited_vertices = {vertex_id}
+        vertices_queue = deque([vertex_id])
+        while vertices_queue:
+            for dependant_vertex in graph[vertices_queue.popleft()]:
+                if dependant_vertex not in visited_vertices:
+                    visited_vertices.add(dependant_vertex)
+                    dependant_vertices.append(dependant_vertex)
+                    vertices_queue.append(dependant_vertex)
 
         return dependant_vertices
 
     # ----------------------------- SORTING ------------------------------#
-    def sort_graph(self, isolated_vertices_position: str = 'end') -> List:
+    def sort_graph(self, isolated_vertices_position: str = 'end', excluded_vertices: Iterable[int] = ()) -> List:
         """
-        Create a topological sorting of the graph, based on the directions in the graph.
+        Create a topological sorting of the graph, based on the directions in the graph. The incrementally maintained
+        topological order is used if available, otherwise the graph is sorted with Kahn's algorithm.
         Args:
             isolated_vertices_position (str): define if isolated vertices go at the beginning or at the end of the
                 sorted list. Valid values are 'start' and 'end'.
+            excluded_vertices (iterable): IDs of the vertices to leave out of the sorting, the remaining vertices are
+                sorted as if the excluded ones (and their edges) were removed from the graph
         """
 
-        require_in_list(isolated_vertices_position, ['start', 'end'])
-
-        # Create a copy of the graph that can be manipulated for sorting
-        graph = copy.deepcopy(self)
-
-        # Initialize the tracking list of which vertices have already been sorted and the sorting order
-        unsorted_vertices = copy.deepcopy(self.vertices)
-        sorted_vertices = []
-
-        isolated_vertices = graph.get_isolated_vertices()
-        for vertex_id in isolated_vertices:
-            unsorted_vertices.remove(vertex_id)
-            graph.remove_vertex(vertex_id)
+        require_in_list(isolated_vertices_position, ISOLATED_VERTICES_POSITIONS)
+        excluded_vertices = set(excluded_vertices)
 
-        if len(unsorted_vertices) > 0:
-            while len(unsorted_vertices) > 1:
-                # Get next end-vertex add it to the sorted list
-                vertex_id = graph.get_next_end_vertex(unsorted_vertices)
-                sorted_vertices.append(vertex_id)
+        # In a graph without edges all the vertices are isolated
+        if not any(self.graph.values()):
+            return [vertex_id for vertex_id in self.vertices if vertex_id not in excluded_vertices]
 
-                # Remove the vertex from the graph and the unsorted vertices list and repeat
-                unsorted_vertices.remove(vertex_id)
-                graph.remove_vertex(vertex_id)
-
-            # Add last unsorted vertex (which by default will not have any edges) and reverse the list
-            sorted_vertices.append(unsorted_vertices[0])
-            sorted_vertices.reverse()
+        # Split the isolated vertices from the connected ones in a single pass, a vertex whose edges all lead to
+        # excluded vertices is isolated as well
+        graph = self.graph
+        graph_inv = self.graph_inv
+        isolated_vertices = []
+        connected_vertices = []
+        if excluded_vertices:
+            for vertex_id in self.vertices:
+                if vertex_id in excluded_vertices:
+                    continue
+                if graph[vertex_id].keys() <= excluded_vertices and graph_inv[vertex_id].keys() <= excluded_vertices:
+                    isolated_vertices.append(vertex_id)
+                else:
+                    connected_vertices.append(vertex_id)
+        else:
+            for vertex_id in self.vertices:
+                if graph[vertex_id] or graph_inv[vertex_id]:
+                    connected_vertices.append(vertex_id)
+                else:
+                    isolated_vertices.append(vertex_id)
+
+        if self._order is not None:
+            # The order of the whole graph is also a topological order of any of its subgraphs
+            connected_vertices.sort(key=self._order.__getitem__)
+            sorted_vertices = connected_vertices
+        else:
+            sorted_vertices = self._release_vertices(connected_vertices, excluded_vertices)
+            if len(sorted_vertices) != len(connected_vertices):
+                err_msg = "Some of the remaining vertices have incoming edges, i.e. they are part of a cycle. " \
+                          "Please use the get_graph_cycle function to identify the vertex that are part of the cycle."
+                raise ValueError(err_msg)
+
+            # The graph is acyclic, cache it and restore the topological order (only known if the graph was sorted
+            # as a whole)
+            if not excluded_vertices:
+                self._cycle = []
+                self._recompute_cycle = False
+                self._order = {vertex_id: position for position, vertex_id in enumerate(sorted_vertices)}
+                self._order.update((vertex_id, position) for position, vertex_id in
+                                   enumerate(isolated_vertices, start=len(sorted_vertices)))
 
         if isolated_vertices_position == 'end':
             sorted_vertices.extend(isolated_vertices)
@@ -254,35 +422,49 @@ class BaseDirectedGraph:
 
         return sorted_vertices
 
-    def get_next_end_vertex(self, remaining_vertices: List[int]) -> int:
+    def _release_vertices(self, vertices_ids: Iterable[int], excluded_vertices: Iterable[int] = ()) -> List:
         """
-        Function returns the first possible vertex that is a dead-end (i.e. no outgoing edge)
+        Private method: Kahn's algorithm, repeatedly take a vertex without (remaining) incoming edges and release the
+        edges starting from it. The graph itself is never modified.
         Args:
-            remaining_vertices (list): list of IDs of remaining vertices
+            vertices_ids (iterable): IDs of the vertices to release, all the predecessors of these vertices must be
+                included as well, unless they are excluded
+            excluded_vertices (iterable): IDs of the vertices that are ignored, as if they were removed from the graph
         Returns:
-            next_vertex (int): ID of next vertex without outgoing edges
+            released_vertices (list): IDs of the released vertices in topological order, the vertices that are part
+                of or depend on a cycle are never released
         """
 
-        require_not_empty(remaining_vertices, failure_message="Input 'remaining_vertices' must not be empty.")
+        graph = self.graph
+        graph_inv = self.graph_inv
 
-        # Loop over the remaining vertices and return the first remaining vertex without outgoing edges
-        for vertex_id in remaining_vertices:
-            if not self.graph[vertex_id]:
-                return vertex_id
+        # Count the incoming edges of the vertices, excluded vertices are never released: their count starts below
+        # zero and is only ever decreased
+        if excluded_vertices:
+            in_degree = {vertex_id: len(graph_inv[vertex_id].keys() - excluded_vertices) for vertex_id in vertices_ids}
+            in_degree.update(dict.fromkeys(excluded_vertices, -1))
+        else:
+            in_degree = {vertex_id: len(graph_inv[vertex_id]) for vertex_id in vertices_ids}
 
-        err_msg = "None of the remaining vertices has no outgoing edges, i.e. they are part of a cycle. " \
-                  "Please use the get_graph_cycle function to identify the vertex that are part of the cycle."
-        raise ValueError(err_msg)
+        released_vertices = []
+        vertices_queue = deque(vertex_id for vertex_id, degree in in_degree.items() if degree == 0)
+        while vertices_queue:
+            vertex_id = vertices_queue.popleft()
+            released_vertices.append(vertex_id)
+
+            for neighbour_id in graph[vertex_id]:
+                in_degree[neighbour_id] -= 1
+                if in_degree[neighbour_id] == 0:
+                    vertices_queue.append(neighbour_id)
+
+        return released_vertices
 
     def get_isolated_vertices(self) -> List:
         """
         Function identified and returns the IDs of the vertices that have neither an entry nor an exit edge
         """
 
-        isolated_vertices = []
-
-        for vertex_id in self.vertices:
-            if not self.graph[vertex_id] and not self.graph_inv[vertex_id]:
-                isolated_vertices.append(vertex_id)
+        graph = self.graph
+        graph_inv = self.graph_inv
 
-        return isolated_vertices
+        return [vertex_id for vertex_id in self.vertices if not graph[vertex_id] and not graph_inv[vertex_id]]
@@ -5,15 +5,17 @@ DirectedGraph is an extension of the BaseDirectedGraph class and handles the map
 integers IDs.
 """
 
-from typing import Union, List
-import copy
+import sys
+from typing import Union, List, Iterable, Tuple
 
-from pytest_ordering.graphs.basegraph import BaseDirectedGraph
+from pytest_ordering.graphs.basegraph import BaseDirectedGraph, DIRECTIONS, ISOLATED_VERTICES_POSITIONS
 from pytest_ordering.utils import require_in_list
 
 
 class DirectedGraph:
 
+    __slots__ = ('new_id', 'vertices_map', 'vertices_map_inv', 'graph')
+
     def __init__(self):
         """
         Initialize a new graph object, including dictionaries to keep track of the vertices numeric IDs
@@ -21,9 +23,10 @@ class DirectedGraph:
         # ID generator counter
         self.new_id = 0
 
-        # Vertices IDs tracking
+        # Vertices IDs tracking, the internal IDs are contiguous and never reused, hence the inverse mapping is a list
+        # indexed by the internal ID
         self.vertices_map = {}
-        self.vertices_map_inv = {}
+        self.vertices_map_inv = []
 
         # Graph object
         self.graph = BaseDirectedGraph()
@@ -34,9 +37,9 @@ class DirectedGraph:
         Function returns the internal vertex ID for an input vertex definition, if the vertex does not exist,
         it creates it.
         """
-        if vertex in self.vertices_map:
-            vertex_id = self.vertices_map[vertex]
-        else:
+        # Single hash lookup on the hit path, which is the common case when adding edges
+        vertex_id = self.vertices_map.get(vertex)
+        if vertex_id is None:
             vertex_id = self.add_vertex(vertex)
 
         return vertex_id
@@ -51,11 +54,16 @@ class DirectedGraph:
             vertex_id (int): internal numerical vertex ID
         """
 
+        # Intern string identifiers (typically test names), so that later lookups with the same name resolve their
+        # dict probes with an identity check (str subclasses cannot be interned and are stored as they are)
+        if type(vertex) is str:
+            vertex = sys.intern(vertex)
+
         # Get new vertex ID and keep track of the mapping in both directions
         vertex_id = self.new_id
         self.new_id += 1
         self.vertices_map[vertex] = vertex_id
-        self.vertices_map_inv[vertex_id] = vertex
+        self.vertices_map_inv.append(vertex)
 
         # Add the vertex to the graph
         self.graph.add_vertex(vertex_id)
@@ -69,10 +77,10 @@ class DirectedGraph:
             vertex (str, int, float): the vertex identifier specified by the user
         """
 
-        if vertex in self.vertices_map:
-            # Remove from vertices map list
-            vertex_id = self.vertices_map.pop(vertex)
-            _ = self.vertices_map_inv.pop(vertex_id)
+        # Remove from vertices map list, with a single lookup
+        vertex_id = self.vertices_map.pop(vertex, None)
+        if vertex_id is not None:
+            self.vertices_map_inv[vertex_id] = None
 
             # Remove vertex from graph
             self.graph.remove_vertex(vertex_id)
@@ -85,8 +93,19 @@ class DirectedGraph:
             start_vertex (str, int, float): the start vertex identifier specified by the user
             end_vertex (str, int, float): the end vertex identifier specified by the user
         """
-        self.graph.add_edge(self._get_vertex_id(start_vertex),
-                            self._get_vertex_id(end_vertex))
+        get_vertex_id = self._get_vertex_id
+        self.graph.add_edge(get_vertex_id(start_vertex), get_vertex_id(end_vertex))
+
+    def add_edges(self, edges: Iterable[Tuple[Union[str, int, float], Union[str, int, float]]]) -> None:
+        """
+        Add several edges to the graph at once
+        Args:
+            edges (iterable): pairs of start and end vertices identifiers specified by the user
+        """
+        get_vertex_id = self._get_vertex_id
+        add_edge = self.graph.add_edge
+        for start_vertex, end_vertex in edges:
+            add_edge(get_vertex_id(start_vertex), get_vertex_id(end_vertex))
 
     def remove_edge(self, start_vertex: Union[str, int, float], end_vertex: Union[str, int, float]) -> None:
         """
@@ -95,8 +114,11 @@ class DirectedGraph:
             start_vertex (str, int, float): the start vertex identifier specified by the user
             end_vertex (str, int, float): the end vertex identifier specified by the user
         """
-        self.graph.remove_edge(self._get_vertex_id(start_vertex),
-                               self._get_vertex_id(end_vertex))
+        # Edges can only exist between known vertices, unknown vertices are not created when removing an edge
+        start_vertex_id = self.vertices_map.get(start_vertex)
+        end_vertex_id = self.vertices_map.get(end_vertex)
+        if start_vertex_id is not None and end_vertex_id is not None:
+            self.graph.remove_edge(start_vertex_id, end_vertex_id)
 
     # ----------------------------- CYCLES ------------------------------#
     def graph_cycle(self) -> List:
@@ -109,7 +131,8 @@ class DirectedGraph:
 
         # Get the graph cycle from the integers graph
         cycle_ids = self.graph.get_graph_cycle()
-        cycle_vertices = [self.vertices_map_inv[vertex] for vertex in cycle_ids]
+        vertices_map_inv = self.vertices_map_inv
+        cycle_vertices = [vertices_map_inv[vertex] for vertex in cycle_ids]
 
         return cycle_vertices
 
@@ -117,12 +140,8 @@ class DirectedGraph:
         """
         Test that the graph does not contain a cyclic component
         """
-        cycle_vertices = self.graph_cycle()
-
-        if not cycle_vertices:
-            return True
-
-        return False
+        # The user-defined IDs of the cycle vertices are not needed to answer this
+        return not self.graph.is_cyclic()
 
     # ----------------------------- DEPENDANTS ------------------------------#
     def get_vertex_dependants(self, vertex: Union[str, int, float], direction: str = 'forward') -> List:
@@ -135,30 +154,36 @@ class DirectedGraph:
             vertices (list): List of dependant vertices
         """
 
-        require_in_list(direction, ['forward', 'backward'])
+        require_in_list(direction, DIRECTIONS)
         vertex_id = self._get_vertex_id(vertex)
 
         dependant_ids = self.graph.get_vertex_dependants(vertex_id, direction=direction)
-        dependant_vertices = [self.vertices_map_inv[vertex_id] for vertex_id in dependant_ids]
+        vertices_map_inv = self.vertices_map_inv
+        dependant_vertices = [vertices_map_inv[vertex_id] for vertex_id in dependant_ids]
 
         return dependant_vertices
 
     # ----------------------------- SORTING ------------------------------#
-    def sort_graph(self, isolated_vertices_position: str = 'end') -> List:
+    def sort_graph(self, isolated_vertices_position: str = 'end',
+                   excluded_vertices: Iterable[Union[str, int, float]] = ()) -> List:
         """
         Create a topological sorting of the graph, based on the directions in the graph.
         Args:
             isolated_vertices_position (str): define if isolated vertices go at the beginning or at the end of the
                 sorted list. Valid values are 'start' and 'end'.
+            excluded_vertices (iterable): user-defined IDs of the vertices to leave out of the sorting, the remaining
+                vertices are sorted as if the excluded ones were removed from the graph
         """
 
-        require_in_list(isolated_vertices_position, ['start', 'end'])
-
-        # Create a copy of the graph that can be manipulated
-        graph = copy.deepcopy(self.graph)
+        require_in_list(isolated_vertices_position, ISOLATED_VERTICES_POSITIONS)
+        # Excluded vertices unknown to the graph are ignored
+        excluded_vertices_ids = [vertex_id for vertex_id in map(self.vertices_map.get, excluded_vertices)
+                                 if vertex_id is not None]
 
-        # Retrieve the sorting of the vertices and map them to the user-defined IDs
-        sorted_vertices_ids = graph.sort_graph(isolated_vertices_position=isolated_vertices_position)
-        sorted_vertices = [self.vertices_map_inv[vertex_id] for vertex_id in sorted_vertices_ids]
+        # Retrieve the sorting of the vertices (the integers graph is not modified) and map them to the user-defined IDs
+        sorted_vertices_ids = self.graph.sort_graph(isolated_vertices_position=isolated_vertices_position,
+                                                    excluded_vertices=excluded_vertices_ids)
+        vertices_map_inv = self.vertices_map_inv
+        sorted_vertices = [vertices_map_inv[vertex_id] for vertex_id in sorted_vertices_ids]
 
         return sorted_vertices
@@ -3,12 +3,13 @@ DirectedGraph implements a direct graph class, with methods to detect cycles, pe
 directed graph operations
 """
 
+import sys
 from typing import List
-import copy
 
 import pytest
 from pytest_ordering.graphs.directedgraph import DirectedGraph
-from pytest_ordering.configs import start_test_items_map, end_test_items_map, special_test_items
+from pytest_ordering.configs import start_test_items_map, end_test_items_map, special_test_items, \
+    _special_test_items_set
 from pytest_ordering.utils import require_in_list, SortingError
 
 
@@ -18,6 +19,8 @@ class TestItemsSorter:
     that the test items sorter is only called once.
     """
 
+    __slots__ = ('test_items', 'start_items', 'end_items', 'graph')
+
     def __init__(self):
         """
         Initialize a test items sorter object
@@ -35,12 +38,17 @@ class TestItemsSorter:
     @staticmethod
     def get_test_item_id(test_item: pytest.Item) -> str:
         """
-        Return a test item identifier
+        Return a test item identifier, interned (if an exact str) so that the repeated lookups of the same item match
+        by identity
         Args:
             test_item (pytest.Item): test item for which to return an ID
         """
 
-        return test_item.name
+        test_item_id = test_item.name
+        if type(test_item_id) is str:
+            test_item_id = sys.intern(test_item_id)
+
+        return test_item_id
 
     def add_test_item(self, test_item: pytest.Item, special_test_item: str = None) -> None:
         """
@@ -54,19 +62,32 @@ class TestItemsSorter:
 
         test_item_id = self.get_test_item_id(test_item)
 
-        if special_test_item is not None:
+        # Constant time check against the set, require_in_list only runs to raise the error listing the names in order
+        if special_test_item is not None and special_test_item not in _special_test_items_set:
             require_in_list(special_test_item, special_test_items)
 
-        if test_item_id not in self.test_items.keys():
+        if test_item_id not in self.test_items:
             self.test_items[test_item_id] = test_item
             self.graph.add_vertex(test_item_id)
 
         if special_test_item is not None:
-            if special_test_item in start_test_items_map.keys():
+            if special_test_item in start_test_items_map:
                 self.start_items[start_test_items_map[special_test_item]] = test_item_id
             else:
                 self.end_items[end_test_items_map[special_test_item]] = test_item_id
 
+    def get_start_items_ids(self) -> List[str]:
+        """
+        Return the IDs of the start test items (e.g., 'first', ..., 'tenth'), in execution order
+        """
+        return [test_item_id for test_item_id in self.start_items if test_item_id is not None]
+
+    def get_end_items_ids(self) -> List[str]:
+        """
+        Return the IDs of the end test items (e.g., 'tenth_to_last', ..., 'last'), in execution order
+        """
+        return [test_item_id for test_item_id in self.end_items if test_item_id is not None]
+
     # ----------------------------- TEST ITEMS RELATIONS ------------------------------#
     def add_relation(self, start_test_item_id: str, end_test_item_id: str) -> None:
         """
@@ -74,79 +95,108 @@ class TestItemsSorter:
         """
         self.graph.add_edge(start_test_item_id, end_test_item_id)
 
-    def add_start_relations(self) -> None:
+    def add_start_relations(self, start_test_items_ids: List[str] = None) -> None:
         """
         Add the relations for the start test items (e.g., 'first', ..., 'tenth')
+        Args:
+            start_test_items_ids (List[str]): IDs of the start test items, as returned by get_start_items_ids
         """
-        start_test_items_ids = [test_item_id for test_item_id in self.start_items if test_item_id is not None]
+        if start_test_items_ids is None:
+            start_test_items_ids = self.get_start_items_ids()
 
-        for start_test_item_id, end_test_item_id in zip(start_test_items_ids, start_test_items_ids[1:]):
-            self.graph.add_edge(start_test_item_id, end_test_item_id)
+        self.graph.add_edges(zip(start_test_items_ids, start_test_items_ids[1:]))
 
-    def add_end_relations(self) -> None:
+    def add_end_relations(self, end_test_items_ids: List[str] = None) -> None:
         """
         Add the relations for the end test items (e.g., 'last', ..., 'tenth_to_last')
+        Args:
+            end_test_items_ids (List[str]): IDs of the end test items, as returned by get_end_items_ids
         """
-        end_test_items_ids = [test_item_id for test_item_id in self.end_items if test_item_id is not None]
+        if end_test_items_ids is None:
+            end_test_items_ids = self.get_end_items_ids()
 
-        for start_test_item_id, end_test_item_id in zip(end_test_items_ids, end_test_items_ids[1:]):
-            self.graph.add_edge(start_test_item_id, end_test_item_id)
+        self.graph.add_edges(zip(end_test_items_ids, end_test_items_ids[1:]))
 
     # ----------------------------- TEST ITEMS RELATIONS CHECKS ------------------------------#
-    def check_if_sorting_possible(self) -> None:
+    def check_if_sorting_possible(self, start_test_items_ids: List[str] = None,
+                                  end_test_items_ids: List[str] = None) -> None:
         """
         Check if sorting of the test priorities is possible.
+        Args:
+            start_test_items_ids (List[str]): IDs of the start test items, as returned by get_start_items_ids
+            end_test_items_ids (List[str]): IDs of the end test items, as returned by get_end_items_ids
         """
-        self.add_start_relations()
-        self.add_end_relations()
+
+        # Compact the start and end slots once, for all the relations and checks
+        if start_test_items_ids is None:
+            start_test_items_ids = self.get_start_items_ids()
+        if end_test_items_ids is None:
+            end_test_items_ids = self.get_end_items_ids()
+
+        self.add_start_relations(start_test_items_ids)
+        self.add_end_relations(end_test_items_ids)
 
         self.check_no_execution_loop()
-        self.check_start_items_execution_order()
-        self.check_end_items_execution_order()
+        self.check_start_items_execution_order(start_test_items_ids)
+        self.check_end_items_execution_order(end_test_items_ids)
 
     def check_no_execution_loop(self) -> None:
         """
         Check that no execution loop exists in the relations graph
         """
-        if not self.graph.is_graph_acyclic():
+        cycle = self.graph.graph_cycle()
+        if cycle:
             message = "The test items contain a relations loop:\n" \
-                     f"{' -> '.join(self.graph.graph_cycle())}\n"
+                     f"{' -> '.join(cycle)}\n"
             raise SortingError(message)
 
-    def check_start_items_execution_order(self) -> None:
+    def check_start_items_execution_order(self, start_test_items_ids: List[str] = None) -> None:
         """
         Check if the start items can be executed in the correct order
+        Args:
+            start_test_items_ids (List[str]): IDs of the start test items, as returned by get_start_items_ids
         """
 
-        start_test_items_ids = [test_item_id for test_item_id in self.start_items if test_item_id is not None]
+        if start_test_items_ids is None:
+            start_test_items_ids = self.get_start_items_ids()
         if not start_test_items_ids:
             return None
 
+        # The start items are chained, hence the other start items are all executed before the last one and in the
+        # chain order. Only the predecessors that are not start items need to be looked for.
         execution_order = self.graph.get_vertex_dependants(start_test_items_ids[-1], direction='backward')
-        execution_order.reverse()
-        execution_order.append(start_test_items_ids[-1])
+        start_test_items_set = set(start_test_items_ids)
+        other_test_items_ids = [test_item_id for test_item_id in execution_order
+                                if test_item_id not in start_test_items_set]
 
-        if start_test_items_ids != execution_order:
+        if other_test_items_ids:
             message = "\n The start test items cannot be executed in the correct order.\n Items: " \
-                     f"{', '.join(list(set(execution_order) - set(start_test_items_ids)))} point to a start item.\n " \
+                     f"{', '.join(other_test_items_ids)} point to a start item.\n " \
                       "Please remove these dependencies to execute the tests in the desired order."
             raise SortingError(message)
 
-    def check_end_items_execution_order(self) -> None:
+    def check_end_items_execution_order(self, end_test_items_ids: List[str] = None) -> None:
         """
         Check if the end items can be executed in the correct order
+        Args:
+            end_test_items_ids (List[str]): IDs of the end test items, as returned by get_end_items_ids
         """
 
-        end_test_items_ids = [test_item_id for test_item_id in self.end_items if test_item_id is not None]
+        if end_test_items_ids is None:
+            end_test_items_ids = self.get_end_items_ids()
         if not end_test_items_ids:
             return None
 
+        # The end items are chained, hence the other end items are all executed after the first one and in the chain
+        # order. Only the successors that are not end items need to be looked for.
         execution_order = self.graph.get_vertex_dependants(end_test_items_ids[0], direction='forward')
-        execution_order.insert(0, end_test_items_ids[0])
+        end_test_items_set = set(end_test_items_ids)
+        other_test_items_ids = [test_item_id for test_item_id in execution_order
+                                if test_item_id not in end_test_items_set]
 
-        if end_test_items_ids != execution_order:
+        if other_test_items_ids:
             message = "\n The end test items cannot be executed in the correct order.\n End test items are pointing " \
-                     f"to items: {', '.join(list(set(execution_order) - set(end_test_items_ids)))}.\n " \
+                     f"to items: {', '.join(other_test_items_ids)}.\n " \
                       "Please remove these dependencies to execute the tests in the desired order."
             raise SortingError(message)
 
@@ -155,34 +205,33 @@ class TestItemsSorter:
         """
         Return a sorted list of the test items
         """
-        # TODO: Return list of sorted items
+        test_items = self.test_items
+        sorted_test_items_ids = self.sort_test_items_ids()
+
+        # Relations can refer to test items IDs that were never added to the sorter
+        unknown_test_items_ids = [test_item_id for test_item_id in sorted_test_items_ids
+                                  if test_item_id not in test_items]
+        if unknown_test_items_ids:
+            message = "\n The test items relations refer to unknown test items: " \
+                     f"{', '.join(unknown_test_items_ids)}.\n " \
+                      "Please add these test items or remove the relations."
+            raise SortingError(message)
+
+        return [test_items[test_item_id] for test_item_id in sorted_test_items_ids]
 
     def sort_test_items_ids(self) -> List[str]:
         """
         Return a sorted list of the test items IDs, that can be used to sort the te
         """
 
-        self.check_if_sorting_possible()
-        graph = copy.deepcopy(self.graph)
-
-        # Remove starting test items from graph
-        start_test_items_ids = [test_item_id for test_item_id in self.start_items if test_item_id is not None]
-        if start_test_items_ids:
-            for start_test_item_id in start_test_items_ids:
-                graph.remove_vertex(start_test_item_id)
-
-        # Remove ending test items from graph
-        end_test_items_ids = [test_item_id for test_item_id in self.end_items if test_item_id is not None]
-        if end_test_items_ids:
-            for end_test_item_id in end_test_items_ids:
-                graph.remove_vertex(end_test_item_id)
+        start_test_items_ids = self.get_start_items_ids()
+        end_test_items_ids = self.get_end_items_ids()
 
-        # Retrieve the sorted list for the remaining test items
-        remaining_test_items_ids = graph.sort_graph(isolated_vertices_position='end')
+        self.check_if_sorting_possible(start_test_items_ids, end_test_items_ids)
 
-        # Build the full sorted items list
-        sorted_test_items_ids = copy.deepcopy(start_test_items_ids)
-        sorted_test_items_ids.extend(remaining_test_items_ids)
-        sorted_test_items_ids.extend(end_test_items_ids)
+        # Retrieve the sorted list for the remaining test items, leaving out the starting and ending test items
+        remaining_test_items_ids = self.graph.sort_graph(isolated_vertices_position='end',
+                                                         excluded_vertices=start_test_items_ids + end_test_items_ids)
 
-        return sorted_test_items_ids
+        # Build the full sorted items list (a new list, the IDs themselves are immutable strings)
+        return [*start_test_items_ids, *remaining_test_items_ids, *end_test_items_ids]
@@ -2,10 +2,10 @@
 Utilities functions used to perform input validation, etc.
 """
 
-from typing import List
+from typing import Collection
 
 
-class ValidationError(BaseException):
+class ValidationError(Exception):
 
     def __init__(self, message: str):
         self.message = message
@@ -22,13 +22,13 @@ def require_not_empty(to_be_validated, failure_message: str = "Must not be empty
         raise ValidationError(message=failure_message)
 
 
-def require_in_list(item, valid_items: List):
+def require_in_list(item, valid_items: Collection):
     if item not in valid_items:
         failure_message = f"Item '{item}' not in valid items list: {', '.join(valid_items)}"
         raise ValidationError(message=failure_message)
 
 
-class SortingError(BaseException):
+class SortingError(Exception):
 
     def __init__(self, message: str):
         self.message = message
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+import random
+import sys
+
+import pytest
+
+from pytest_ordering.graphs.basegraph import BaseDirectedGraph
+from pytest_ordering.graphs.directedgraph import DirectedGraph
+
+
+def edges_of(graph):
+    return [(start, end) for start in list(graph.graph) for end in graph.graph[start]]
+
+
+def assert_topological(sorted_vertices, edges):
+    positions = {vertex: position for position, vertex in enumerate(sorted_vertices)}
+    for start, end in edges:
+        if start in positions and end in positions:
+            assert positions[start] < positions[end], (start, end, sorted_vertices)
+
+
+def assert_order_valid(graph):
+    positions = graph._order
+    assert set(positions) == set(graph.vertices)
+    assert len(set(positions.values())) == len(positions)
+    for start, end in edges_of(graph):
+        assert positions[start] < positions[end]
+
+
+def assert_cycle_witness(cycle, edges):
+    assert len(cycle) >= 2 and cycle[0] == cycle[-1]
+    assert all(edge in edges for edge in zip(cycle, cycle[1:]))
+
+
+def is_cyclic_reference(vertices, edges):
+    # A vertex that reaches itself is part of a cycle
+    successors = {vertex: [] for vertex in vertices}
+    for start, end in edges:
+        successors[start].append(end)
+    for vertex in vertices:
+        stack = list(successors[vertex])
+        visited = set()
+        while stack:
+            current = stack.pop()
+            if current == vertex:
+                return True
+            if current not in visited:
+                visited.add(current)
+                stack.extend(successors[current])
+    return False
+
+
+def test_edge_respecting_order_keeps_order():
+    graph = BaseDirectedGraph()
+    for vertex in range(3):
+        graph.add_vertex(vertex)
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 2)
+
+    assert graph._order == {0: 0, 1: 1, 2: 2}
+    assert not graph.is_cyclic()
+    assert graph.sort_graph() == [0, 1, 2]
+
+
+def test_backward_edge_reorders():
+    graph = BaseDirectedGraph()
+    for vertex in range(4):
+        graph.add_vertex(vertex)
+    graph.add_edge(0, 1)
+    graph.add_edge(3, 0)
+
+    assert graph._order is not None
+    assert_order_valid(graph)
+    assert graph._order[3] < graph._order[0] < graph._order[1]
+    assert not graph.is_cyclic()
+    assert graph.sort_graph() == [3, 0, 1, 2]
+
+
+def test_backward_edge_closing_cycle():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 2)
+    graph.add_edge(2, 0)
+
+    assert graph._order is None
+    assert graph.is_cyclic()
+    assert_cycle_witness(graph.get_graph_cycle(), edges_of(graph))
+    with pytest.raises(ValueError):
+        graph.sort_graph()
+
+
+def test_self_loop():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 1)
+
+    assert graph.is_cyclic()
+    assert graph.get_graph_cycle() == [1, 1]
+
+    graph.remove_edge(1, 1)
+    assert not graph.is_cyclic()
+    assert graph.sort_graph() == [0, 1]
+
+    graph.add_edge(1, 1)
+    graph.remove_vertex(1)
+    assert not graph.is_cyclic()
+    assert graph.sort_graph() == [0]
+
+
+def test_order_search_limit_fallback_and_restore():
+    graph = BaseDirectedGraph()
+    graph.order_search_limit = 1
+    for vertex in range(5):
+        graph.add_vertex(vertex)
+    for vertex in range(3):
+        graph.add_edge(vertex, vertex + 1)
+
+    # The backward edge affects more vertices than the limit allows, the order is dropped
+    graph.add_edge(4, 0)
+    assert graph._order is None
+
+    # The full search finds the graph acyclic and restores the order
+    assert not graph.is_cyclic()
+    assert graph._order is not None
+    assert_order_valid(graph)
+    assert graph.sort_graph() == [4, 0, 1, 2, 3]
+
+
+def test_order_restored_by_sort_graph():
+    graph = BaseDirectedGraph()
+    graph.order_search_limit = 0
+    graph.add_edge(0, 1)
+    graph.add_edge(2, 0)
+    assert graph._order is None
+
+    assert graph.sort_graph() == [2, 0, 1]
+    assert_order_valid(graph)
+    assert not graph.is_cyclic()
+
+
+def test_graph_cycle_not_found_raises(monkeypatch):
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 0)
+
+    # The vertices left by Kahn's algorithm must contain a cycle, failing to find it is an internal error
+    monkeypatch.setattr(graph, 'get_subcycle', lambda *args: [])
+    with pytest.raises(RuntimeError):
+        graph.get_graph_cycle()
+
+
+def test_cycle_cache_kept_when_removing_non_members():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 0)
+    graph.add_edge(2, 3)
+    graph.add_edge(3, 2)
+    graph.add_edge(4, 5)
+    cycle = graph.get_graph_cycle()
+    assert_cycle_witness(cycle, edges_of(graph))
+
+    # Removing an edge or a vertex outside of the cached cycle keeps it
+    other = 2 if 0 in cycle else 0
+    graph.remove_edge(4, 5)
+    graph.remove_vertex(5)
+    graph.remove_edge(other, other + 1)
+    assert not graph._recompute_cycle
+    assert graph.get_graph_cycle() == cycle
+    assert graph.is_cyclic()
+
+
+def test_cycle_cache_invalidated_by_remove_edge():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 0)
+    graph.add_edge(2, 3)
+    graph.add_edge(3, 2)
+    cycle = graph.get_graph_cycle()
+
+    # The other cycle is found after breaking the cached one
+    graph.remove_edge(cycle[0], cycle[1])
+    assert graph.is_cyclic()
+    new_cycle = graph.get_graph_cycle()
+    assert_cycle_witness(new_cycle, edges_of(graph))
+    assert not set(new_cycle) & set(cycle)
+
+    graph.remove_edge(new_cycle[0], new_cycle[1])
+    assert not graph.is_cyclic()
+    assert graph.get_graph_cycle() == []
+
+
+def test_cycle_cache_invalidated_by_remove_vertex():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 2)
+    graph.add_edge(2, 0)
+    graph.add_edge(2, 3)
+    assert graph.is_cyclic()
+
+    graph.remove_vertex(1)
+    assert not graph.is_cyclic()
+    assert graph.sort_graph() == [2, 0, 3]
+
+
+def test_dependants_cache_invalidated():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    assert graph.get_vertex_dependants(0) == [1]
+
+    graph.add_edge(1, 2)
+    assert graph.get_vertex_dependants(0) == [1, 2]
+    assert graph.get_vertex_dependants(2, direction='backward') == [1, 0]
+
+    graph.remove_edge(0, 1)
+    assert graph.get_vertex_dependants(0) == []
+
+    graph.remove_vertex(1)
+    assert graph.get_vertex_dependants(2, direction='backward') == []
+
+    # The returned list is a copy of the cached one
+    graph.add_edge(2, 3)
+    graph.get_vertex_dependants(2).append(4)
+    assert graph.get_vertex_dependants(2) == [3]
+
+
+@pytest.mark.parametrize('order_search_limit', [0, 100])
+def test_sort_graph_excluded_vertices(order_search_limit):
+    graph = BaseDirectedGraph()
+    graph.order_search_limit = order_search_limit
+    for vertex in range(6):
+        graph.add_vertex(vertex)
+    graph.add_edge(1, 2)
+    graph.add_edge(3, 0)
+    graph.add_edge(0, 1)
+    graph.add_edge(4, 5)
+
+    # Vertex 3 only points to the excluded vertex, it becomes isolated
+    sorted_vertices = graph.sort_graph(excluded_vertices=[0])
+    assert sorted(sorted_vertices[:-1]) == [1, 2, 4, 5] and sorted_vertices[-1] == 3
+    assert_topological(sorted_vertices, edges_of(graph))
+    sorted_vertices = graph.sort_graph(isolated_vertices_position='start', excluded_vertices=[0])
+    assert sorted_vertices[0] == 3 and sorted(sorted_vertices[1:]) == [1, 2, 4, 5]
+    assert_topological(sorted_vertices, edges_of(graph))
+    assert graph.sort_graph(excluded_vertices=[0, 4]) == [1, 2, 3, 5]
+
+    # The graph itself is not modified
+    assert set(graph.vertices) == set(range(6))
+    sorted_vertices = graph.sort_graph()
+    assert sorted(sorted_vertices) == list(range(6))
+    assert_topological(sorted_vertices, edges_of(graph))
+
+
+def test_sort_graph_excluded_vertices_with_cycle():
+    graph = BaseDirectedGraph()
+    graph.add_edge(0, 1)
+    graph.add_edge(1, 2)
+    graph.add_edge(2, 1)
+
+    # The cycle is still part of the sorted vertices
+    with pytest.raises(ValueError):
+        graph.sort_graph(excluded_vertices=[0])
+
+    # Sorting a subgraph without the cycle does not mark the whole graph as acyclic
+    assert graph.sort_graph(excluded_vertices=[1]) == [0, 2]
+    assert graph.is_cyclic()
+
+
+@pytest.mark.parametrize('order_search_limit', [1, 2, 3, 100])
+def test_graph_against_reference(order_search_limit):
+    rng = random.Random(order_search_limit)
+    for _ in range(100):
+        graph = BaseDirectedGraph()
+        graph.order_search_limit = order_search_limit
+        for _ in range(40):
+            operation = rng.random()
+            start, end = rng.randrange(8), rng.randrange(8)
+            if operation < 0.55:
+                graph.add_edge(start, end)
+            elif operation < 0.75:
+                graph.remove_edge(start, end)
+            elif operation < 0.85:
+                graph.remove_vertex(start)
+            else:
+                graph.add_vertex(start)
+
+            vertices = list(graph.vertices)
+            edges = edges_of(graph)
+            cyclic = is_cyclic_reference(vertices, edges)
+            assert graph.is_cyclic() == cyclic
+            if graph._order is not None:
+                assert_order_valid(graph)
+
+            if cyclic:
+                assert_cycle_witness(graph.get_graph_cycle(), edges)
+                continue
+
+            for position in ['start', 'end']:
+                sorted_vertices = graph.sort_graph(isolated_vertices_position=position)
+                assert sorted(sorted_vertices) == sorted(vertices)
+                assert_topological(sorted_vertices, edges)
+
+            excluded = rng.sample(vertices, min(len(vertices), 2))
+            sorted_vertices = graph.sort_graph(excluded_vertices=excluded)
+            assert sorted(sorted_vertices) == sorted(set(vertices) - set(excluded))
+            assert_topological(sorted_vertices, edges)
+
+            vertex = rng.randrange(8)
+            if vertex in graph.vertices:
+                reachable = {end for end in vertices if end != vertex and
+                             is_cyclic_reference(vertices, edges + [(end, vertex)])}
+                assert set(graph.get_vertex_dependants(vertex)) == reachable
+
+
+def test_directed_graph_string_vertices_interned():
+    graph = DirectedGraph()
+    name = ''.join(['tests/test_module.py::', 'test_name'])
+    graph.add_edge(name, 'b')
+
+    stored = next(iter(graph.vertices_map))
+    assert stored == name and stored is sys.intern(name)
+    assert graph.vertices_map_inv[0] is stored
+
+
+def test_directed_graph_str_subclass_vertices():
+    class Name(str):
+        pass
+
+    graph = DirectedGraph()
+    graph.add_edge(Name('a'), 'b')
+    graph.add_edge('b', Name('c'))
+
+    assert graph.sort_graph() == ['a', 'b', 'c']
+    assert type(graph.sort_graph()[0]) is Name
+    assert graph.get_vertex_dependants('a') == ['b', 'c']
+
+
+def test_directed_graph_remove_edge_unknown_vertices():
+    graph = DirectedGraph()
+    graph.add_edge('a', 'b')
+    vertices_map = dict(graph.vertices_map)
+
+    graph.remove_edge('x', 'y')
+    graph.remove_edge('a', 'y')
+    graph.remove_edge('x', 'b')
+    assert graph.vertices_map == vertices_map
+    assert graph.vertices_map_inv == ['a', 'b']
+    assert graph.sort_graph() == ['a', 'b']
+
+    graph.remove_edge('a', 'b')
+    assert graph.vertices_map == vertices_map
+    assert graph.get_vertex_dependants('a') == []
+
+
+def test_directed_graph_sort_excluded_vertices():
+    graph = DirectedGraph()
+    graph.add_edge('a', 'b')
+    graph.add_edge('b', 'c')
+
+    # Unknown vertices are ignored
+    assert graph.sort_graph(excluded_vertices=['b', 'x']) == ['a', 'c']
+    assert graph.sort_graph(isolated_vertices_position='start', excluded_vertices=['a']) == ['b', 'c']
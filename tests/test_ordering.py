@@ -266,6 +266,54 @@ def test_order_mark_class(item_names_for):
     assert item_names_for(tests_content) == ['test_3', 'test_4', 'test_5', 'test_1', 'test_2']
 
 
+def test_stacked_order_marks(item_names_for):
+    tests_content = """
+    import pytest
+
+    def test_1(): pass
+
+
+    @pytest.mark.last
+    @pytest.mark.first
+    def test_2(): pass
+
+
+    @pytest.mark.first
+    @pytest.mark.last
+    def test_3(): pass
+    """
+
+    assert item_names_for(tests_content) == ['test_2', 'test_3', 'test_1']
+
+
+def test_order_marks_on_class_and_method(item_names_for):
+    tests_content = """
+    import pytest
+
+    def test_1(): pass
+
+
+    @pytest.mark.last
+    class TestLast(object):
+
+        @pytest.mark.first
+        def test_2(self): pass
+
+        def test_3(self): pass
+
+
+    @pytest.mark.first
+    class TestFirst(object):
+
+        @pytest.mark.last
+        def test_4(self): pass
+
+        def test_5(self): pass
+    """
+
+    assert item_names_for(tests_content) == ['test_2', 'test_4', 'test_5', 'test_1', 'test_3']
+
+
 def test_markers_registered(capsys):
     pytest.main(['--markers'])
     out, err = capsys.readouterr()
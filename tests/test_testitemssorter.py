@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import sys
+from collections import namedtuple
+
+import pytest
+
+from pytest_ordering import configs, testitemssorter
+from pytest_ordering.utils import ValidationError, SortingError
+
+# Test items stand-in, the sorter only reads the item name
+Item = namedtuple('Item', 'name')
+
+
+def sorter_for(names, special_test_items=(), relations=()):
+    sorter = testitemssorter.TestItemsSorter()
+    for name in names:
+        sorter.add_test_item(Item(name))
+    for start_name, end_name in relations:
+        sorter.add_relation(start_name, end_name)
+    for name, special_test_item in special_test_items:
+        sorter.add_test_item(Item(name), special_test_item)
+    return sorter
+
+
+def test_special_items_ids():
+    sorter = sorter_for('abcd', [('c', 'second'), ('a', 'first'), ('b', 'last'), ('d', 'second_to_last')])
+
+    assert sorter.get_start_items_ids() == ['a', 'c']
+    assert sorter.get_end_items_ids() == ['d', 'b']
+
+
+def test_special_items_ids_follow_slots():
+    sorter = sorter_for('abc', [('a', 'first')])
+    assert sorter.get_start_items_ids() == ['a']
+
+    # The IDs are read from the current slots, also after they are changed directly
+    sorter.start_items[1] = 'b'
+    assert sorter.get_start_items_ids() == ['a', 'b']
+    sorter.end_items = [None] * (len(sorter.end_items) - 1) + ['c']
+    assert sorter.get_end_items_ids() == ['c']
+    assert sorter.sort_test_items_ids() == ['a', 'b', 'c']
+
+
+def test_special_items_ids_compacted_once_per_sort(monkeypatch):
+    calls = []
+    get_start_items_ids = testitemssorter.TestItemsSorter.get_start_items_ids
+    get_end_items_ids = testitemssorter.TestItemsSorter.get_end_items_ids
+    monkeypatch.setattr(testitemssorter.TestItemsSorter, 'get_start_items_ids',
+                        lambda sorter: calls.append('start') or get_start_items_ids(sorter))
+    monkeypatch.setattr(testitemssorter.TestItemsSorter, 'get_end_items_ids',
+                        lambda sorter: calls.append('end') or get_end_items_ids(sorter))
+
+    sorter = sorter_for('abcd', [('a', 'first'), ('b', 'second'), ('c', 'last')])
+    assert sorter.sort_test_items_ids() == ['a', 'b', 'd', 'c']
+    assert calls == ['start', 'end']
+
+
+def test_sort_test_items():
+    items = {name: Item(name) for name in 'abcde'}
+    sorter = testitemssorter.TestItemsSorter()
+    for item in items.values():
+        sorter.add_test_item(item)
+    sorter.add_test_item(items['d'], 'first')
+    sorter.add_test_item(items['a'], 'last')
+    sorter.add_relation('e', 'b')
+
+    sorted_items = sorter.sort_test_items()
+    assert [item.name for item in sorted_items] == sorter.sort_test_items_ids() == ['d', 'e', 'b', 'c', 'a']
+    assert all(item is items[item.name] for item in sorted_items)
+
+
+def test_sort_test_items_unknown_relation():
+    sorter = testitemssorter.TestItemsSorter()
+    sorter.add_test_item(Item('a'))
+    sorter.add_test_item(Item('b'))
+    sorter.add_relation('a', 'typo')
+
+    with pytest.raises(SortingError) as error:
+        sorter.sort_test_items()
+    assert 'The test items relations refer to unknown test items: typo.' in error.value.message
+
+
+def test_special_test_items_config():
+    assert isinstance(configs.special_test_items, list)
+    assert configs.special_test_items == list(configs.start_test_items_map) + list(configs.end_test_items_map)
+
+
+def test_invalid_special_test_item():
+    sorter = testitemssorter.TestItemsSorter()
+
+    with pytest.raises(ValidationError) as error:
+        sorter.add_test_item(Item('a'), 'eleventh')
+    assert error.value.message.startswith("Item 'eleventh' not in valid items list: first, second,")
+    assert 'a' not in sorter.test_items
+
+
+def test_redundant_relations_along_chains():
+    sorter = sorter_for('abcdef',
+                        [('a', 'first'), ('b', 'second'), ('c', 'third'), ('d', 'third_to_last'),
+                         ('e', 'second_to_last'), ('f', 'last')],
+                        relations=[('a', 'c'), ('d', 'f')])
+
+    assert sorter.sort_test_items_ids() == ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+def test_item_pointing_to_start_items():
+    sorter = sorter_for('abcd', [('a', 'first'), ('b', 'second')], relations=[('d', 'b'), ('c', 'a')])
+
+    with pytest.raises(SortingError) as error:
+        sorter.sort_test_items_ids()
+    assert 'The start test items cannot be executed in the correct order' in error.value.message
+    assert 'Items: d, c point to a start item' in error.value.message
+
+
+def test_end_items_pointing_to_item():
+    sorter = sorter_for('abcd', [('a', 'second_to_last'), ('b', 'last')], relations=[('a', 'c')])
+
+    with pytest.raises(SortingError) as error:
+        sorter.sort_test_items_ids()
+    assert 'The end test items cannot be executed in the correct order' in error.value.message
+    assert 'End test items are pointing to items: c.' in error.value.message
+
+
+def test_relations_loop():
+    sorter = sorter_for('abc', relations=[('a', 'b'), ('b', 'c'), ('c', 'a')])
+
+    with pytest.raises(SortingError) as error:
+        sorter.sort_test_items_ids()
+    assert 'The test items contain a relations loop' in error.value.message
+
+
+def test_test_item_ids():
+    class Name(str):
+        pass
+
+    name = ''.join(['tests/test_module.py::', 'test_name'])
+    assert testitemssorter.TestItemsSorter.get_test_item_id(Item(name)) is sys.intern(name)
+
+    sorter = sorter_for([Name('a'), 'b'], [(Name('a'), 'last')])
+    assert sorter.sort_test_items_ids() == ['b', 'a']